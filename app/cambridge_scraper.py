@@ -1,16 +1,67 @@
 """Scrape vocabulary data from Cambridge Dictionary with async support"""
+import os
 import re
+import gzip
+import json
+import time
 import asyncio
+import hashlib
+import tempfile
 from pathlib import Path
-from typing import Optional, List, Dict, Tuple
+from typing import AsyncIterator, Optional, List, Dict, Tuple
 
 import httpx
-from bs4 import BeautifulSoup, NavigableString
+import aiofiles
+from aiolimiter import AsyncLimiter
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 from tqdm.asyncio import tqdm as async_tqdm
 from loguru import logger
 
 from app.config.settings import get_settings
 from app.models import CambridgeData
+from app.utils import clean_word, is_fresh, atomic_write_bytes
+
+
+_WHITESPACE_RE = re.compile(r"[ \t]+")
+_HIGHLIGHT_CLASSES = ["b", "db"]
+
+
+def _is_def_block(css_class: Optional[str]) -> bool:
+    """Match sense blocks by class substring without going through the regex engine"""
+    return css_class is not None and 'def-block' in css_class
+
+
+def _is_entry_block(css_class: Optional[str]) -> bool:
+    """Match entry blocks; while parsing, the strainer sees the raw unsplit class attribute"""
+    return css_class is not None and 'entry-body__el' in css_class.split()
+
+
+# Everything we extract lives inside entry blocks, so only those are built into the tree
+_ENTRY_STRAINER = SoupStrainer('div', class_=_is_entry_block)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry network errors, 429 and 5xx; other HTTP errors such as 404 are final"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status_code = exc.response.status_code
+        return status_code == 429 or status_code >= 500
+    return isinstance(exc, httpx.RequestError)
+
+
+def _absolute_url(url: str) -> str:
+    """Resolve protocol- and site-relative Cambridge URLs"""
+    if url.startswith('//'):
+        return 'https:' + url
+    elif url.startswith('/'):
+        return 'https://dictionary.cambridge.org' + url
+    return url
 
 
 class CambridgeScraper:
@@ -24,90 +75,198 @@ class CambridgeScraper:
     def __init__(self):
         self.settings = get_settings()
         self.semaphore = asyncio.Semaphore(self.settings.max_concurrent_scrapes)
+        # Bucket capacity must hold at least one request, so rates below 1/s widen the period instead
+        bucket_size = max(1.0, self.settings.scraper_rps)
+        self.rate_limiter = AsyncLimiter(bucket_size, bucket_size / self.settings.scraper_rps)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._users = 0  # Callers currently inside `async with scraper:`
+        self._cache_dir = Path(self.settings.cache_dir) / "cambridge"
+        self._missing_path = self._cache_dir / "missing.json"
+        self._missing: Dict[str, float] = {}
+        # Words currently being processed, so concurrent callers share one fetch
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def __aenter__(self) -> "CambridgeScraper":
+        """
+        Open a pooled HTTP/2 client shared by all scrapes and audio downloads.
+        The context can be entered by several concurrent callers; the client is
+        opened on the first enter and closed on the last exit.
+        """
+        self._users += 1
+        if self._users > 1:
+            return self
+
+        self._missing = self._load_missing()
+        self._client = httpx.AsyncClient(
+            headers=self.HEADERS,
+            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=self.settings.max_concurrent_scrapes * 2,
+                max_keepalive_connections=self.settings.max_concurrent_scrapes
+            )
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._users -= 1
+        if self._users:
+            return
+
+        # Detach before awaiting, so a caller entering during aclose() gets a fresh client
+        client, self._client = self._client, None
+        self._save_missing()
+        await client.aclose()
+
+    async def warmup(self):
+        """Resolve DNS and open a pooled connection to Cambridge ahead of the first scrape"""
+        try:
+            async with self.rate_limiter:
+                await self._client.head(self.BASE_URL)
+        except httpx.HTTPError as e:
+            # Best effort only, the first real request will connect anyway
+            logger.debug(f"Cambridge warmup failed: {e}")
 
     async def scrape_word(self, word: str) -> Optional[CambridgeData]:
         """Scrape all data for a word from Cambridge Dictionary"""
         word = word.strip().lower()
-        url = f"{self.BASE_URL}/{re.sub(r"[ \t]+", "-", word)}"
+        slug = _WHITESPACE_RE.sub('-', word)
+        url = f"{self.BASE_URL}/{slug}"
 
-        async with self.semaphore:
-            # Rate limiting
-            await asyncio.sleep(self.settings.scraper_rate_limit)
+        if self._is_known_missing(word):
+            logger.warning(f"⚠ Skipping {word}: not found on a previous run")
+            return None
 
+        page = self._read_cached_page(slug)
+        if page is None:
             try:
-                async with httpx.AsyncClient(timeout=30.0, headers=self.HEADERS) as client:
-                    response = await client.get(url)
-                    response.raise_for_status()
+                async for attempt in self._retrying():
+                    with attempt:
+                        # Rate (requests/second) and concurrency are limited separately
+                        async with self.rate_limiter, self.semaphore:
+                            response = await self._client.get(url)
+                        response.raise_for_status()
             except httpx.RequestError as e:
                 logger.error(f"⚠ Error fetching {word}: {e}")
                 return None
             except httpx.HTTPStatusError as e:
+                if e.response.status_code == 404:
+                    self._mark_missing(word)
                 logger.error(f"⚠ HTTP error fetching {word}: {e}")
                 return None
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            page = response.content
+            await asyncio.to_thread(self._write_cached_page, slug, page)
 
-            # Extract phonetic (US)
-            phonetic_us = self._extract_phonetic_us(soup)
+        # Parsing is CPU-bound, keep it off the event loop so fetches keep flowing
+        phonetic_us, audio_url, definitions = await asyncio.to_thread(self._parse_page, page)
 
-            # Extract audio URL (US)
-            audio_url = self._extract_audio_url_us(soup)
+        if not definitions:
+            self._mark_missing(word)
+            logger.warning(f"⚠ No definitions found for: {word}")
+            return None
 
-            # Extract definitions with examples
-            definitions = self._extract_definitions(soup)
+        return CambridgeData(
+            word=word,
+            definitions=definitions,
+            audio_url=audio_url,
+            phonetic_us=phonetic_us
+        )
+
+    def _retrying(self) -> AsyncRetrying:
+        """Retry policy for transient request failures: exponential backoff with jitter"""
+        backoff = wait_exponential_jitter(initial=0.5, max=self.settings.retry_max_wait)
+
+        def wait(retry_state: RetryCallState) -> float:
+            # Honor the server's Retry-After on 429 when it gives a delay in seconds,
+            # capped so one long delay can't park a worker and stall the pipeline
+            exc = retry_state.outcome.exception()
+            if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429:
+                retry_after = exc.response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    return min(float(retry_after), self.settings.retry_max_wait)
+            return backoff(retry_state)
+
+        return AsyncRetrying(
+            stop=stop_after_attempt(self.settings.retry_max_attempts),
+            wait=wait,
+            retry=retry_if_exception(_is_retryable),
+            reraise=True
+        )
+
+    def _parse_page(self, page: bytes) -> Tuple[Optional[str], Optional[str], List[Dict]]:
+        """Parse a word page into (phonetic_us, audio_url, definitions)"""
+        soup = BeautifulSoup(page, 'lxml', from_encoding='utf-8', parse_only=_ENTRY_STRAINER)
+
+        # Collect every node we need in a single walk of the document
+        us_pron = first_ipa = first_audio = None
+        entries = []
+        for tag in soup.descendants:
+            name = tag.name
+            if name == 'span':
+                classes = tag.get('class', ())
+                if us_pron is None and 'us' in classes:
+                    us_pron = tag
+                if first_ipa is None and 'ipa' in classes:
+                    first_ipa = tag
+            elif name == 'source':
+                if first_audio is None and tag.get('type') == 'audio/mpeg':
+                    first_audio = tag
+            elif name == 'div' and 'entry-body__el' in tag.get('class', ()):
+                entries.append(tag)
+
+        # Phonetic: prefer US pronunciation, fallback to any phonetic
+        ipa = (us_pron.find('span', class_='ipa') if us_pron else None) or first_ipa
+        phonetic_us = ipa.get_text(strip=True) if ipa else None
+
+        # Audio: prefer US audio, fallback to any audio
+        audio_tag = us_pron.find('source', type='audio/mpeg') if us_pron else None
+        if not (audio_tag and audio_tag.get('src')):
+            audio_tag = first_audio
+        audio_url = _absolute_url(audio_tag['src']) if audio_tag and audio_tag.get('src') else None
 
-            if not definitions:
-                logger.warning(f"⚠ No definitions found for: {word}")
-                return None
+        definitions = []
+        for entry in entries:
+            definitions.extend(self._extract_entry_definitions(entry))
 
-            return CambridgeData(
-                word=word,
-                definitions=definitions,
-                audio_url=audio_url,
-                phonetic_us=phonetic_us
-            )
+        return phonetic_us, audio_url, definitions
+
+    def _page_cache_path(self, slug: str) -> Path:
+        """Cache file for a word page, keyed by a hash of its URL slug"""
+        key = hashlib.sha1(slug.encode('utf-8')).hexdigest()
+        return self._cache_dir / f"{key}.html.gz"
+
+    def _read_cached_page(self, slug: str) -> Optional[bytes]:
+        """Return the cached page body if present and not expired"""
+        cache_path = self._page_cache_path(slug)
+        if not is_fresh(cache_path, self.settings.cache_ttl_days):
+            return None
+        try:
+            return gzip.decompress(cache_path.read_bytes())
+        except (OSError, EOFError):
+            # Corrupt cache entry, refetch
+            return None
 
-    def _extract_phonetic_us(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract US phonetic transcription"""
-        # Try to find US pronunciation
-        us_pron = soup.find('span', class_='us')
-        if us_pron:
-            ipa = us_pron.find('span', class_='ipa')
-            if ipa:
-                return ipa.get_text(strip=True)
-
-        # Fallback to any phonetic
-        ipa = soup.find('span', class_='ipa')
-        if ipa:
-            return ipa.get_text(strip=True)
-
-        return None
-
-    def _extract_audio_url_us(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract US audio URL"""
-        # Look for US audio
-        us_audio = soup.find('span', class_='us')
-        if us_audio:
-            audio_tag = us_audio.find('source', type='audio/mpeg')
-            if audio_tag and audio_tag.get('src'):
-                url = audio_tag['src']
-                if url.startswith('//'):
-                    return 'https:' + url
-                elif url.startswith('/'):
-                    return 'https://dictionary.cambridge.org' + url
-                return url
-
-        # Fallback to any audio
-        audio_tag = soup.find('source', type='audio/mpeg')
-        if audio_tag and audio_tag.get('src'):
-            url = audio_tag['src']
-            if url.startswith('//'):
-                return 'https:' + url
-            elif url.startswith('/'):
-                return 'https://dictionary.cambridge.org' + url
-            return url
-
-        return None
+    def _write_cached_page(self, slug: str, page: bytes):
+        atomic_write_bytes(self._page_cache_path(slug), gzip.compress(page))
+
+    def _load_missing(self) -> Dict[str, float]:
+        """Load words that had no Cambridge entry, with the time they were seen"""
+        try:
+            return json.loads(self._missing_path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_missing(self):
+        data = json.dumps(self._missing, ensure_ascii=False).encode('utf-8')
+        atomic_write_bytes(self._missing_path, data)
+
+    def _is_known_missing(self, word: str) -> bool:
+        seen_at = self._missing.get(word)
+        return seen_at is not None and time.time() - seen_at < self.settings.cache_ttl_days * 86400
+
+    def _mark_missing(self, word: str):
+        self._missing[word] = time.time()
 
     def _get_examples(self, soup: BeautifulSoup, max_example: int = 3) -> Optional[str]:
         """Extract examples using the provided method"""
@@ -139,21 +298,15 @@ class CambridgeScraper:
 
             # handle example sentence
             exp_sentence = "  "
-            if examples_box and exp.find("span", "eg deg"):
-                exp_sentence_tag = exp.find("span", "eg deg")
-                for child in exp_sentence_tag.children:
-                    if isinstance(child, NavigableString):
-                        exp_sentence += child.text
-                    else:
-                        if (
-                            child.name == "span"
-                            and child.attrs.get("class") == "b db".split()
-                        ):
-                            exp_sentence += (
-                                f'<span class="example_highligh">{child.text}</span>'
-                            )
-                        else:
-                            exp_sentence += child.text
+            exp_sentence_tag = exp.find("span", "eg deg") if examples_box else None
+            if exp_sentence_tag:
+                # Highlight the pattern spans, keep everything else as plain text
+                exp_sentence += "".join(
+                    f'<span class="example_highligh">{child.text}</span>'
+                    if child.name == "span" and child.get("class") == _HIGHLIGHT_CLASSES
+                    else child.text
+                    for child in exp_sentence_tag.children
+                )
             else:
                 # Extract example sentence from expanded section
                 exp_sentence += exp.get_text()
@@ -164,44 +317,40 @@ class CambridgeScraper:
 
         return "\n".join(examples) if examples else None
 
-    def _extract_definitions(self, soup: BeautifulSoup) -> List[Dict]:
-        """Extract all definitions with word types, meanings, and examples"""
-        definitions = []
+    def _extract_entry_definitions(self, entry: Tag) -> List[Dict]:
+        """Extract definitions with word type, meaning, and examples from one entry block"""
+        # Get word type (pos)
+        pos_header = entry.find('div', class_='pos-header')
+        if not pos_header:
+            return []
 
-        # Find all definition blocks
-        entries = soup.find_all('div', class_='entry-body__el')
+        pos = pos_header.find('span', class_='pos')
+        word_type = pos.get_text(strip=True) if pos else "unknown"
 
-        for entry in entries:
-            # Get word type (pos)
-            pos_header = entry.find('div', class_='pos-header')
-            if not pos_header:
-                continue
-
-            pos = pos_header.find('span', class_='pos')
-            word_type = pos.get_text(strip=True) if pos else "unknown"
+        definitions = []
 
-            # Find all sense blocks (different meanings)
-            sense_blocks = entry.find_all('div', class_=re.compile(r'def-block'))
+        # Find all sense blocks (different meanings)
+        sense_blocks = entry.find_all('div', class_=_is_def_block)
 
-            for sense in sense_blocks:
-                # Get definition
-                def_tag = sense.find('div', class_='def')
-                if not def_tag:
-                    continue
+        for sense in sense_blocks:
+            # Get definition
+            def_tag = sense.find('div', class_='def')
+            if not def_tag:
+                continue
 
-                english_meaning = def_tag.get_text().strip()
-                if english_meaning and not english_meaning[-1].isalpha():
-                    english_meaning = english_meaning[:-1]
+            english_meaning = def_tag.get_text().strip()
+            if english_meaning and not english_meaning[-1].isalpha():
+                english_meaning = english_meaning[:-1]
 
-                # Get examples using the new method
-                examples_str = self._get_examples(sense, max_example=3)
-                examples = examples_str.split('\n') if examples_str else []
+            # Get examples using the new method
+            examples_str = self._get_examples(sense, max_example=3)
+            examples = examples_str.split('\n') if examples_str else []
 
-                definitions.append({
-                    'word_type': word_type,
-                    'english_meaning': english_meaning,
-                    'examples': examples
-                })
+            definitions.append({
+                'word_type': word_type,
+                'english_meaning': english_meaning,
+                'examples': examples
+            })
 
         return definitions
 
@@ -214,27 +363,52 @@ class CambridgeScraper:
         filename = f"{word}.mp3"
         filepath = Path(self.settings.audio_download_dir) / filename
 
+        # Already downloaded by a previous run
+        if filepath.exists() and filepath.stat().st_size > 0:
+            return str(filepath)
+
         # Create directory if not exists
         filepath.parent.mkdir(parents=True, exist_ok=True)
 
+        # Stream into a uniquely named temp file so an interrupted download is never
+        # taken as complete and concurrent downloads never share a partial file
+        fd, part_name = tempfile.mkstemp(dir=filepath.parent, prefix=f"{word}.", suffix=".mp3.part")
+        os.close(fd)
+        part_path = Path(part_name)
         try:
-            async with httpx.AsyncClient(timeout=30.0, headers=self.HEADERS) as client:
-                response = await client.get(audio_url)
-                response.raise_for_status()
-
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-
-                return str(filepath)
-        except httpx.RequestError as e:
+            async for attempt in self._retrying():
+                with attempt:
+                    async with self._client.stream("GET", audio_url) as response:
+                        response.raise_for_status()
+
+                        async with aiofiles.open(part_path, 'wb') as f:
+                            async for chunk in response.aiter_bytes(65536):
+                                await f.write(chunk)
+
+            part_path.replace(filepath)
+            return str(filepath)
+        except (httpx.RequestError, httpx.HTTPStatusError) as e:
             logger.error(f"⚠ Error downloading audio for {word}: {e}")
             return ""
+        finally:
+            # No-op once the download has been moved into place
+            part_path.unlink(missing_ok=True)
 
     async def process_word(self, word: str) -> Optional[Tuple[str, CambridgeData, str]]:
         """
         Scrape word data and download audio.
+        Concurrent calls for the same word (e.g. from topics processed in parallel)
+        wait for the one already in progress instead of fetching it again.
         Returns tuple of (word, CambridgeData, audio_path) or None
         """
+        task = self._in_flight.get(word)
+        if task is None:
+            task = self._in_flight[word] = asyncio.ensure_future(self._process_word(word))
+            task.add_done_callback(lambda _: self._in_flight.pop(word, None))
+        # Shielded so one cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _process_word(self, word: str) -> Optional[Tuple[str, CambridgeData, str]]:
         cambridge_data = await self.scrape_word(word)
         if not cambridge_data:
             return None
@@ -245,6 +419,50 @@ class CambridgeScraper:
 
         return (word, cambridge_data, audio_path)
 
+    async def iter_words(
+        self,
+        words: List[str],
+        show_progress: bool = True
+    ) -> AsyncIterator[Tuple[str, Optional[CambridgeData], str]]:
+        """
+        Process words with a bounded pool of workers, yielding results as they complete.
+        Must be called inside `async with scraper:` so requests share one client.
+        Words are normalized and deduplicated, so each distinct word is processed once.
+        Yields (word, CambridgeData, audio_path) tuples in completion order.
+        Words that failed yield (word, None, "").
+        """
+        unique_words = list(dict.fromkeys(clean_word(word) for word in words))
+        pending = iter(unique_words)
+        # Twice the scrape limit so audio downloads don't starve page fetches
+        num_workers = min(len(unique_words), self.settings.max_concurrent_scrapes * 2)
+        results: asyncio.Queue = asyncio.Queue(maxsize=num_workers)
+
+        async def worker():
+            for word in pending:
+                try:
+                    result = await self.process_word(word)
+                except Exception as e:
+                    logger.error(f"⚠ Exception processing {word}: {e}")
+                    result = None
+                await results.put(result or (word, None, ""))
+
+        workers = [asyncio.create_task(worker()) for _ in range(num_workers)]
+        try:
+            with async_tqdm(
+                total=len(unique_words),
+                desc="🔍 Scraping Cambridge",
+                unit="word",
+                ncols=100,
+                disable=not show_progress
+            ) as progress:
+                for _ in range(len(unique_words)):
+                    result = await results.get()
+                    progress.update(1)
+                    yield result
+        finally:
+            for task in workers:
+                task.cancel()
+
     async def process_words_batch(
         self,
         words: List[str],
@@ -252,30 +470,13 @@ class CambridgeScraper:
     ) -> List[Tuple[str, Optional[CambridgeData], str]]:
         """
         Process multiple words concurrently with progress bar.
-        Returns list of (word, CambridgeData, audio_path) tuples.
+        Must be called inside `async with scraper:` so requests share one client.
+        Returns list of (word, CambridgeData, audio_path) tuples in input order,
+        with words normalized; duplicates are scraped once and share a result.
         Words that failed return (word, None, "").
         """
-        tasks = [self.process_word(word) for word in words]
-
-        if show_progress:
-            results = await async_tqdm.gather(
-                *tasks,
-                desc="🔍 Scraping Cambridge",
-                unit="word",
-                ncols=100
-            )
-        else:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Process results
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"⚠ Exception processing {words[i]}: {result}")
-                processed_results.append((words[i], None, ""))
-            elif result is None:
-                processed_results.append((words[i], None, ""))
-            else:
-                processed_results.append(result)
+        results_by_word = {}
+        async for result in self.iter_words(words, show_progress):
+            results_by_word[result[0]] = result
 
-        return processed_results
\ No newline at end of file
+        return [results_by_word[clean_word(word)] for word in words]
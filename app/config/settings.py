@@ -1,3 +1,5 @@
+from functools import lru_cache
+from pydantic import Field
 from pydantic_settings import BaseSettings
 from pathlib import Path
 
@@ -17,26 +19,41 @@ class Settings(BaseSettings):
     input_dir: str = "data/input"
     output_dir: str = "data/output"
     failed_dir: str = "data/failed"
+    cache_dir: str = "data/cache"
+    keep_intermediate: bool = True  # Save topic word lists to input_dir for reuse with --csv
+
+    # Cache settings
+    cache_ttl_days: float = 30.0  # Max age of cached pages before refetching
 
     # Concurrency settings
     max_concurrent_scrapes: int = 5  # Max concurrent Cambridge scrapes
     max_concurrent_llm: int = 3      # Max concurrent LLM requests
     llm_batch_size: int = 8          # Number of words per LLM batch request
-    scraper_rate_limit: float = 0.5  # Delay between scrapes (seconds)
+    max_concurrent_topics: int = 3   # Max topics processed at once in multi-topic mode
+    scraper_rps: float = Field(5.0, gt=0)  # Max Cambridge page requests per second
+    scraper_rate_limit: float = 0.5  # Deprecated: superseded by scraper_rps, no longer used
+
+    # Retry settings for transient HTTP failures (network errors, 429, 5xx)
+    retry_max_attempts: int = 4      # Total attempts per request, including the first
+    retry_max_wait: float = 8.0      # Max backoff between attempts (seconds)
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    """Load settings from the environment and .env once per process"""
     return Settings()
 
 
+@lru_cache(maxsize=1)
 def ensure_directories():
-    """Create necessary directories if they don't exist"""
+    """Create necessary directories if they don't exist (once per process)"""
     settings = get_settings()
     Path(settings.audio_download_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.input_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.output_dir).mkdir(parents=True, exist_ok=True)
-    Path(settings.failed_dir).mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+    Path(settings.failed_dir).mkdir(parents=True, exist_ok=True)
+    Path(settings.cache_dir).mkdir(parents=True, exist_ok=True)
\ No newline at end of file
@@ -1,95 +1,92 @@
 """Generate CSV output from processed vocabulary data"""
 import csv
-from typing import List
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Tuple
 from pathlib import Path
 
 from app.models import ProcessedWord, VocabularyEntry
 from app.utils import create_cloze
 
 
+# Column order of the output CSV, matching the VocabularyEntry fields
+CSV_HEADER = [
+    'word',
+    'type',
+    'cloze',
+    'phonetic',
+    'audio',
+    'vietnamese_meaning',
+    'english_meaning',
+    'example'
+]
+
+
 class CSVGenerator:
     """Generate final CSV output with all vocabulary data"""
 
-    def generate_entries(self, processed_words: List[ProcessedWord]) -> List[VocabularyEntry]:
-        """Convert processed words to vocabulary entries for export"""
-        entries = []
-
+    def iter_entry_rows(self, processed_words: Iterable[ProcessedWord]) -> Iterator[Tuple[str, ...]]:
+        """Yield one CSV row per processed word, in CSV_HEADER order"""
         for word_data in processed_words:
-            # Combine all definitions into single entry
+            # Combine all definitions into single entry in one pass
             all_types = []
             all_vietnamese = []
             all_english = []
             all_examples = []
+            phonetic = ""
 
             for definition in word_data.selected_definitions:
                 all_types.append(definition.word_type)
                 all_vietnamese.append(definition.vietnamese_meaning)
                 all_english.append(definition.english_meaning)
                 all_examples.extend(definition.examples)
+                # Use the first phonetic available, preferring earlier definitions
+                if not phonetic and definition.phonetic:
+                    phonetic = definition.phonetic
 
-            # Use the first definition's phonetic if available
-            phonetic = word_data.selected_definitions[0].phonetic if word_data.selected_definitions else ""
-            if not phonetic:
-                # Try to get phonetic from any definition
-                for def_item in word_data.selected_definitions:
-                    if def_item.phonetic:
-                        phonetic = def_item.phonetic
-                        break
-
-            entry = VocabularyEntry(
-                word=word_data.word,
-                type=", ".join(all_types),  # Join all word types
-                cloze=create_cloze(word_data.word),
-                phonetic=phonetic or "",
-                audio=word_data.audio_path,
-                vietnamese_meaning=" | ".join(all_vietnamese),  # Separate meanings with |
-                english_meaning=" | ".join(all_english),  # Separate meanings with |
-                example="\n".join(all_examples)  # Each example on new line
+            yield (
+                word_data.word,
+                ", ".join(all_types),  # Join all word types
+                create_cloze(word_data.word),
+                phonetic,
+                word_data.audio_path,
+                " | ".join(all_vietnamese),  # Separate meanings with |
+                " | ".join(all_english),  # Separate meanings with |
+                "\n".join(all_examples)  # Each example on new line
             )
 
-            entries.append(entry)
-
-        return entries
+    def generate_entries(self, processed_words: List[ProcessedWord]) -> List[VocabularyEntry]:
+        """Convert processed words to vocabulary entries (not used by the CSV export path)"""
+        # Rows are already plain strings in field order, so skip Pydantic validation
+        return [
+            VocabularyEntry.model_construct(**dict(zip(CSV_HEADER, row)))
+            for row in self.iter_entry_rows(processed_words)
+        ]
 
-    def export_to_csv(self, entries: List[VocabularyEntry], output_path: str):
-        """Export vocabulary entries to CSV file"""
+    @contextmanager
+    def open_writer(self, output_path: str) -> Iterator[Any]:
+        """Open the output CSV, write the header, and yield a csv writer for data rows"""
         # Ensure output directory exists
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
         with open(output_path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            yield writer
 
-            # Write header
-            writer.writerow([
-                'word',
-                'type',
-                'cloze',
-                'phonetic',
-                'audio',
-                'vietnamese_meaning',
-                'english_meaning',
-                'example'
-            ])
+    def write_rows(self, writer: Any, processed_words: Iterable[ProcessedWord]):
+        """Write processed words as data rows"""
+        writer.writerows(self.iter_entry_rows(processed_words))
 
-            # Write data rows
-            for entry in entries:
-                writer.writerow([
-                    entry.word,
-                    entry.type,
-                    entry.cloze,
-                    entry.phonetic,
-                    entry.audio,
-                    entry.vietnamese_meaning,
-                    entry.english_meaning,
-                    entry.example
-                ])
+    def export_to_csv(self, processed_words: Iterable[ProcessedWord], output_path: str):
+        """Export processed words to CSV file"""
+        with self.open_writer(output_path) as writer:
+            self.write_rows(writer, processed_words)
 
     def generate_and_export(
         self,
         processed_words: List[ProcessedWord],
         output_path: str
     ) -> str:
-        """Generate entries and export to CSV in one step"""
-        entries = self.generate_entries(processed_words)
-        self.export_to_csv(entries, output_path)
+        """Convert processed words to rows and export to CSV in one step"""
+        self.export_to_csv(processed_words, output_path)
         return output_path
@@ -0,0 +1,23 @@
+"""Chat model shared by the LLM pipeline stages"""
+import httpx
+from langchain_openai import AzureChatOpenAI
+
+from app.config.settings import get_settings
+
+
+def create_llm() -> AzureChatOpenAI:
+    """Create the Azure OpenAI chat model, shareable across pipeline stages"""
+    settings = get_settings()
+    return AzureChatOpenAI(
+        model=settings.llm_model,
+        api_key=settings.azure_openai_api_key,
+        azure_endpoint=settings.azure_openai_endpoint,
+        api_version=settings.openai_api_version,
+        temperature=settings.llm_temperature,
+        # One pooled HTTP/2 client so concurrent requests multiplex over a single connection.
+        # Only async calls (ainvoke) use it; sync calls go through the SDK's own client.
+        http_async_client=httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=settings.max_concurrent_llm)
+        )
+    )
@@ -1,21 +1,28 @@
 """Process vocabulary data using LLM with batch processing and async support"""
 import asyncio
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-from bs4 import formatter
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from tqdm.asyncio import tqdm as async_tqdm
-from langchain_openai import AzureChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.exceptions import OutputParserException
 from loguru import logger
 
 from app.config.settings import get_settings
+from app.llm import create_llm
 from app.models import CambridgeData, WordDefinition, ProcessedWord
+from app.utils import clean_word
+
+
+# How many times words missing from an LLM batch response are re-sent
+MAX_REPAIR_DEPTH = 2
 
 
 class SelectedDefinitions(BaseModel):
     """Selected word definitions with Vietnamese translations and examples"""
+    word: str = Field(description="The word these definitions belong to, exactly as given in its '#### Word:' heading")
     definitions: List[WordDefinition] = Field(
         min_length=1,
         max_length=3,
@@ -29,21 +36,18 @@ class BatchProcessWords(BaseModel):
     )
 
 
+# Rendered once: the BatchProcessWords schema never changes between requests
+_FORMAT_INSTRUCTIONS = PydanticOutputParser(pydantic_object=BatchProcessWords).get_format_instructions()
+
+
 class LLMProcessor:
     """Use LLM to process and enrich vocabulary data with batch processing"""
 
-    def __init__(self):
+    def __init__(self, llm: Optional[BaseChatModel] = None):
         self.settings = get_settings()
-        self.llm = AzureChatOpenAI(
-            model=self.settings.llm_model,
-            api_key=self.settings.azure_openai_api_key,
-            azure_endpoint=self.settings.azure_openai_endpoint,
-            api_version=self.settings.openai_api_version,
-            temperature=self.settings.llm_temperature
-        )
+        self.llm = llm or create_llm()
         self.batch_size = self.settings.llm_batch_size
         self.semaphore = asyncio.Semaphore(self.settings.max_concurrent_llm)
-        self.parser = PydanticOutputParser(pydantic_object=BatchProcessWords)
 
     async def  process_words(
         self,
@@ -102,7 +106,7 @@ class LLMProcessor:
                     "\n"
                     "Output structure:\n"
                     "- Return a **list of processed words**.\n"
-                    "- Each word entry contains its list of WordDefinition objects (1-2 per word type).\n"
+                    "- Each word entry contains the word itself, copied exactly from its '#### Word:' heading, and its list of WordDefinition objects (1-2 per word type).\n"
                     "- Maintain strict data structure compatibility with your schema.\n"
                     "\n"
                     "{format_instructions}\n"
@@ -120,11 +124,68 @@ class LLMProcessor:
             result = await chain.ainvoke({
                 "num_word": len(cambridge_data),
                 "words": formatted_cambridge_data,
-                "format_instructions": self.parser.get_format_instructions()
+                "format_instructions": _FORMAT_INSTRUCTIONS
             })
 
             return result
 
+    async def process_batch(
+        self,
+        batch: List[Tuple[str, CambridgeData, str]],
+        depth: int = 0
+    ) -> List[ProcessedWord]:
+        """
+        Process one batch of (word, CambridgeData, audio_path) tuples with a single LLM request.
+        Results are matched to inputs by word; words the LLM left out are re-sent as a
+        smaller batch, up to MAX_REPAIR_DEPTH times. If a multi-word request fails
+        with unparsable output, each word is retried on its own.
+        Returns the processed words; failed words are logged and left out.
+        """
+        try:
+            batch_result = await self.process_words([data[1] for data in batch])
+        except Exception as e:
+            # Only malformed output is worth splitting up; API errors (rate limits, timeouts,
+            # auth) would just fail again per word, multiplying requests against the API
+            if len(batch) > 1 and isinstance(e, (OutputParserException, ValidationError)):
+                logger.warning(f"⚠ LLM output for a batch of {len(batch)} words was invalid, retrying one by one: {e}")
+                async with asyncio.TaskGroup() as tg:
+                    tasks = [tg.create_task(self.process_batch([data], depth)) for data in batch]
+                return [processed for task in tasks for processed in task.result()]
+
+            for word, _, _ in batch:
+                logger.error(f"⚠ LLM processing failed for {word}: {e}")
+            return []
+
+        items_by_word = {clean_word(item.word): item for item in batch_result.words}
+
+        processed_words = []
+        missing = []
+        # Stitch audio paths back to words
+        for word, cambridge_data, audio_path in batch:
+            item = items_by_word.get(clean_word(word))
+            if item is None:
+                missing.append((word, cambridge_data, audio_path))
+                continue
+            processed_words.append(
+                ProcessedWord(
+                    word=word,
+                    selected_definitions=item.definitions,
+                    audio_path=audio_path
+                )
+            )
+
+        if missing:
+            missing_words = ", ".join(word for word, _, _ in missing)
+            if depth < MAX_REPAIR_DEPTH:
+                logger.warning(
+                    f"⚠ LLM returned {len(batch) - len(missing)}/{len(batch)} words, retrying: {missing_words}"
+                )
+                processed_words.extend(await self.process_batch(missing, depth + 1))
+            else:
+                logger.error(f"⚠ LLM returned no result for: {missing_words}")
+
+        return processed_words
+
     async def process_words_batch(
         self,
         word_data_list: List[Tuple[str, CambridgeData, str]],
@@ -135,57 +196,51 @@ class LLMProcessor:
         word_data_list: List of (word, CambridgeData, audio_path) tuples
         Returns: List of ProcessedWord objects
         """
-        # Remove words that failed Cambridge scraping
-        valid_data = [(w, cd, ap) for w, cd, ap in word_data_list if cd is not None]
+        # Remove words that failed Cambridge scraping, and send each distinct word once
+        unique_data = {clean_word(w): (w, cd, ap) for w, cd, ap in word_data_list if cd is not None}
+        valid_data = list(unique_data.values())
         if not valid_data:
             return []
 
         batch_size = self.settings.llm_batch_size
 
         # Partition valid_data into batches
-        # cd_data = [data[1] for data in valid_data]
         batches = [
             valid_data[i:i + batch_size]
             for i in range(0, len(valid_data), batch_size)
         ]
 
-        # Prepare coroutines, each sending a batch to process_words
-        coros = [self.process_words([data[1] for data in batch]) for batch in batches]
-
-        # Run all LLM batch requests concurrently (with progress bar if enabled)
-        if show_progress:
-            results = await async_tqdm.gather(
-                *coros,
-                desc="🤖 Processing with LLM",
-                unit="word batch",
-                ncols=100
-            )
-        else:
-            results = await asyncio.gather(*coros, return_exceptions=True)
-
-        processed_words = []
-        # Flatten the results and stitch audio paths back to words
-        for batch_idx, batch_result in enumerate(results):
-            batch = batches[batch_idx]
-            if isinstance(batch_result, Exception):
-                batch_words = [w for w, _, _ in batch]
-                for word in batch_words:
-                    logger.error(f"⚠ LLM processing failed for {word}: {batch_result}")
-                continue
-
-            for item, (word, _, audio_path) in zip(batch_result.words, batch):
-                # If LLM result structure is a dict/TypedModel with .definitions, use it
-                # Otherwise, assume item is WordDefinition list
-                selected_definitions = getattr(item, "definitions", item)
-                processed_words.append(
-                    ProcessedWord(
-                        word=word,
-                        selected_definitions=selected_definitions,
-                        audio_path=audio_path
-                    )
-                )
-
-        return processed_words
+        # Run all LLM batch requests concurrently (with progress bar if enabled).
+        # process_batch logs and absorbs per-batch failures, so only unexpected
+        # errors reach the task group, which then cancels the remaining batches.
+        with async_tqdm(
+            total=len(batches),
+            desc="🤖 Processing with LLM",
+            unit="word batch",
+            ncols=100,
+            disable=not show_progress
+        ) as progress:
+            async def run_batch(batch: List[Tuple[str, CambridgeData, str]]) -> List[ProcessedWord]:
+                result = await self.process_batch(batch)
+                progress.update(1)
+                return result
+
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(run_batch(batch)) for batch in batches]
+
+        results = [task.result() for task in tasks]
+
+        # Fan results back out to every input occurrence, in input order
+        processed_by_word = {
+            clean_word(processed.word): processed
+            for batch_result in results
+            for processed in batch_result
+        }
+        return [
+            processed_by_word[key]
+            for key in (clean_word(w) for w, _, _ in word_data_list)
+            if key in processed_by_word
+        ]
 
     def _format_definitions(self, cambridge_data: CambridgeData) -> str:
         """Format definitions for LLM prompt"""
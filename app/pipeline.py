@@ -1,16 +1,43 @@
 """Main pipeline to orchestrate the vocabulary generation process with async support"""
 import asyncio
 import csv
+import os
+import tempfile
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from loguru import logger
+from tqdm.asyncio import tqdm as async_tqdm
 
 from app.config.settings import get_settings, ensure_directories
 from app.topic_generator import TopicVocabularyGenerator
 from app.cambridge_scraper import CambridgeScraper
+from app.llm import create_llm
 from app.llm_processor import LLMProcessor
 from app.csv_generator import CSVGenerator
-from app.models import ProcessedWord
+from app.models import CambridgeData
+from app.utils import clean_words
+
+try:
+    import uvloop
+except ImportError:  # Optional: falls back to the default asyncio event loop
+    uvloop = None
+
+
+def _run(coro):
+    """Run a coroutine to completion, on a uvloop event loop when available"""
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
+
+# Process umask, read once at import (os.umask can only be queried by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _topic_slug(topic: str) -> str:
+    """File name stem for a topic's word list and flashcards"""
+    return topic.lower().replace(' ', '_')
 
 
 class VocabularyPipeline:
@@ -19,21 +46,22 @@ class VocabularyPipeline:
     def __init__(self):
         ensure_directories()
         self.settings = get_settings()
-        self.topic_generator = TopicVocabularyGenerator()
+        self._input_dir = Path(self.settings.input_dir)
+        self._output_dir = Path(self.settings.output_dir)
+        # One chat model (and HTTP connection pool) shared by both LLM stages
+        llm = create_llm()
+        self.topic_generator = TopicVocabularyGenerator(llm=llm)
         self.scraper = CambridgeScraper()
-        self.llm_processor = LLMProcessor()
+        self.llm_processor = LLMProcessor(llm=llm)
         self.csv_generator = CSVGenerator()
 
     def read_words_from_csv(self, csv_path: str) -> List[str]:
         """Read words from a CSV file (first column only)"""
-        words = []
-        with open(csv_path, 'r', encoding='utf-8') as f:
+        # Large read buffer: input word lists can run to many thousands of rows
+        with open(csv_path, 'r', encoding='utf-8', buffering=1 << 20) as f:
             reader = csv.reader(f)
             next(reader, None)  # Skip header if exists
-            for row in reader:
-                if row:  # Skip empty rows
-                    words.append(row[0].strip().lower())
-        return words
+            return clean_words(row[0] for row in reader if row)  # Skip empty rows
 
     async def process_from_topic_async(
         self,
@@ -44,18 +72,99 @@ class VocabularyPipeline:
         Process vocabulary generation from a topic (async).
         Steps: Topic -> Word List -> Process -> Output CSV
         """
+        # Generate the word list while the scraper connects to Cambridge
+        async with self.scraper:
+            result, _ = await asyncio.gather(
+                self._process_topic_async(topic, output_path),
+                self.scraper.warmup()
+            )
+
+        return result
+
+    async def process_from_topics_async(
+        self,
+        topics: List[str],
+        concurrency: Optional[int] = None
+    ) -> List[str]:
+        """
+        Process several topics concurrently (async), sharing the scraper and LLM clients.
+        At most `concurrency` topics (default: max_concurrent_topics) run at once.
+        Topics that map to the same output files (e.g. 'Travel' and 'travel') run once.
+        Returns one output path per distinct topic, "" for topics that failed.
+        """
+        topics_by_slug = {}
+        for topic in (topic.strip() for topic in topics):
+            if not topic:
+                continue
+            first = topics_by_slug.setdefault(_topic_slug(topic), topic)
+            if first != topic:
+                logger.warning(f"⚠ Skipping topic {topic}: same output files as {first}")
+        topics = list(topics_by_slug.values())
+        semaphore = asyncio.Semaphore(concurrency or self.settings.max_concurrent_topics)
+
+        # Per-topic progress bars would overwrite each other, so track whole topics instead
+        with async_tqdm(total=len(topics), desc="📚 Processing topics", unit="topic", ncols=100) as progress:
+            async def run_topic(topic: str) -> str:
+                async with semaphore:
+                    try:
+                        return await self._process_topic_async(topic, show_progress=False)
+                    except Exception as e:
+                        # One failed topic should not abort the others
+                        logger.error(f"⚠ Failed to process topic {topic}: {e}")
+                        return ""
+                    finally:
+                        progress.update(1)
+
+            async with self.scraper:
+                results, _ = await asyncio.gather(
+                    asyncio.gather(*(run_topic(topic) for topic in topics)),
+                    self.scraper.warmup()
+                )
+
+        return results
+
+    async def _process_topic_async(
+        self,
+        topic: str,
+        output_path: Optional[str] = None,
+        show_progress: bool = True
+    ) -> str:
+        """
+        Generate, save and process the word list for one topic.
+        Must be called inside `async with self.scraper:`.
+        """
         logger.info(f"📚 Generating vocabulary for topic: {topic}")
 
         # Step 1: Generate word list from topic
-        temp_word_list = Path(self.settings.input_dir) / f"{topic.lower().replace(' ', '_')}_words.csv"
-        self.topic_generator.generate_and_save(topic, str(temp_word_list))
-        logger.success(f"✓ Generated word list: {temp_word_list}\n")
+        words = await self.topic_generator.generate_words_from_topic_async(topic)
+        words = clean_words(words)
+        logger.success(f"✓ Generated {len(words)} words")
 
-        # Step 2-4: Process the word list
+        slug = _topic_slug(topic)
         if not output_path:
-            output_path = str(Path(self.settings.output_dir) / f"{topic.lower().replace(' ', '_')}_flashcards.csv")
+            output_path = str(self._output_dir / f"{slug}_flashcards.csv")
 
-        return await self.process_from_csv_async(str(temp_word_list), output_path)
+        # Step 2-4: Process the word list, saving it alongside if requested
+        async with asyncio.TaskGroup() as tg:
+            if self.settings.keep_intermediate:
+                word_list_path = self._input_dir / f"{slug}_words.csv"
+                tg.create_task(self._save_word_list(words, word_list_path))
+            result = await self._process_words_async(words, output_path, show_progress)
+
+        return result
+
+    async def _save_word_list(self, words: List[str], path: Path):
+        """
+        Write a generated word list to CSV without blocking the event loop.
+        The list is only a convenience copy, so a failed write is logged rather than
+        raised, which would cancel the processing running alongside it.
+        """
+        try:
+            await asyncio.to_thread(self.topic_generator.save_to_csv, words, str(path))
+        except OSError as e:
+            logger.warning(f"⚠ Could not save word list to {path}: {e}")
+            return
+        logger.success(f"✓ Saved word list: {path}")
 
     async def process_from_csv_async(
         self,
@@ -64,56 +173,160 @@ class VocabularyPipeline:
     ) -> str:
         """
         Process vocabulary generation from a CSV file (async).
-        Steps: CSV -> Scrape Cambridge -> LLM Process -> Output CSV
+        Steps: CSV -> Scrape Cambridge -> LLM Process -> Output CSV, pipelined
         """
         logger.info(f"📖 Reading words from: {csv_path}")
 
         # Step 1: Read words from CSV
-        words = self.read_words_from_csv(csv_path)
+        words = await asyncio.to_thread(self.read_words_from_csv, csv_path)
+
+        if not output_path:
+            output_filename = Path(csv_path).stem + "_flashcards.csv"
+            output_path = str(self._output_dir / output_filename)
+
+        async with self.scraper:
+            return await self._process_words_async(words, output_path)
+
+    async def _process_words_async(
+        self,
+        words: List[str],
+        output_path: str,
+        show_progress: bool = True
+    ) -> str:
+        """
+        Scrape, process with LLM and export a list of normalized words.
+        Must be called inside `async with self.scraper:`.
+        Returns the output path, or "" if no word made it through.
+        """
+        unique_words = list(dict.fromkeys(words))
+        if len(unique_words) < len(words):
+            logger.info(f"Skipping {len(words) - len(unique_words)} duplicate words")
+        words = unique_words
         logger.info(f"Found {len(words)} words to process\n")
 
-        # Step 2: Scrape Cambridge Dictionary concurrently with progress bar
-        logger.info("=" * 60)
-        scrape_results = await self.scraper.process_words_batch(words, show_progress=True)
-        successful_scrapes = [(w, cd, ap) for w, cd, ap in scrape_results if cd is not None]
-        logger.success(f"✓ Successfully scraped {len(successful_scrapes)}/{len(words)} words\n")
+        # Step 2-4: Scrape, process with LLM and write CSV as results arrive.
+        # Rows go to a temp file next to the output, which only replaces it once at
+        # least one word made it through, so a failed run never clobbers an old deck.
+        output_dir = Path(output_path).parent
+        output_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=output_dir, suffix=".csv.tmp")
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        try:
+            logger.info("=" * 60)
+            scraped_count, processed_count = await self._scrape_process_export(words, tmp_name, show_progress)
+            logger.success(f"✓ Successfully scraped {scraped_count}/{len(words)} words")
 
-        if not successful_scrapes:
-            logger.warning("⚠ No words were successfully scraped. Exiting.")
-            return ""
+            if not scraped_count:
+                logger.warning("⚠ No words were successfully scraped. Exiting.")
+                return ""
 
-        # Step 3: Process with LLM concurrently with progress bar
-        logger.info("=" * 60)
-        processed_words = await self.llm_processor.process_words_batch(
-            successful_scrapes,
-            show_progress=True
-        )
-        logger.success(f"✓ Successfully processed {len(processed_words)}/{len(successful_scrapes)} words with LLM\n")
+            logger.success(f"✓ Successfully processed {processed_count}/{scraped_count} words with LLM\n")
 
-        if not processed_words:
-            logger.warning("⚠ No words were successfully processed by LLM. Exiting.")
-            return ""
+            if not processed_count:
+                logger.warning("⚠ No words were successfully processed by LLM. Exiting.")
+                return ""
 
-        # Step 4: Generate output CSV
-        if not output_path:
-            output_filename = Path(csv_path).stem + "_flashcards.csv"
-            output_path = str(Path(self.settings.output_dir) / output_filename)
+            # mkstemp creates the file owner-only; give the deck the usual permissions
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+            os.replace(tmp_path, output_path)
+        finally:
+            # No-op once the rows have been moved into place
+            tmp_path.unlink(missing_ok=True)
 
-        self.csv_generator.generate_and_export(processed_words, output_path)
         logger.info("=" * 60)
         logger.success(f"💾 Output saved to: {output_path}")
-        logger.info(f"📊 Final: {len(processed_words)}/{len(words)} words completed successfully")
+        logger.info(f"📊 Final: {processed_count}/{len(words)} words completed successfully")
         logger.info("=" * 60)
 
         return output_path
 
+    async def _scrape_process_export(
+        self,
+        words: List[str],
+        output_path: str,
+        show_progress: bool = True
+    ) -> Tuple[int, int]:
+        """
+        Stream words through scraping -> LLM -> CSV with bounded hand-offs between stages.
+        LLM batches start as soon as llm_batch_size words are scraped, and rows are
+        written as each batch finishes, so output rows are in completion order.
+        Returns (scraped_count, processed_count).
+        """
+        batch_size = self.settings.llm_batch_size
+        # Caps batches waiting on or running in the LLM, which backpressures scraping
+        llm_slots = asyncio.Semaphore(self.settings.max_concurrent_llm)
+        llm_queue: asyncio.Queue = asyncio.Queue()
+        scraped_count = 0
+
+        llm_progress = async_tqdm(
+            total=0,
+            desc="🤖 Processing with LLM",
+            unit="word",
+            ncols=100,
+            position=1,
+            disable=not show_progress
+        )
+
+        async def process_batch(batch: List[Tuple[str, CambridgeData, str]]):
+            try:
+                await llm_queue.put(await self.llm_processor.process_batch(batch))
+                llm_progress.update(len(batch))
+            finally:
+                llm_slots.release()
+
+        async def write_rows() -> int:
+            written = 0
+            with self.csv_generator.open_writer(output_path) as writer:
+                while (processed_words := await llm_queue.get()) is not None:
+                    # Single writer task, so rows from different batches never interleave
+                    await asyncio.to_thread(self.csv_generator.write_rows, writer, processed_words)
+                    written += len(processed_words)
+            return written
+
+        with llm_progress:
+            async with asyncio.TaskGroup() as tg:
+                writer_task = tg.create_task(write_rows())
+
+                async with asyncio.TaskGroup() as llm_tg:
+                    batch = []
+                    async for word, cambridge_data, audio_path in self.scraper.iter_words(words, show_progress):
+                        if cambridge_data is None:
+                            continue
+                        scraped_count += 1
+                        llm_progress.total = scraped_count
+                        llm_progress.refresh()
+
+                        batch.append((word, cambridge_data, audio_path))
+                        if len(batch) == batch_size:
+                            await llm_slots.acquire()
+                            llm_tg.create_task(process_batch(batch))
+                            batch = []
+
+                    if batch:
+                        await llm_slots.acquire()
+                        llm_tg.create_task(process_batch(batch))
+
+                # All LLM batches are done, let the writer finish
+                await llm_queue.put(None)
+
+        return scraped_count, writer_task.result()
+
     def process_from_topic(
         self,
         topic: str,
         output_path: Optional[str] = None
     ) -> str:
         """Synchronous wrapper for process_from_topic_async"""
-        return asyncio.run(self.process_from_topic_async(topic, output_path))
+        return _run(self.process_from_topic_async(topic, output_path))
+
+    def process_from_topics(
+        self,
+        topics: List[str],
+        concurrency: Optional[int] = None
+    ) -> List[str]:
+        """Synchronous wrapper for process_from_topics_async"""
+        return _run(self.process_from_topics_async(topics, concurrency))
 
     def process_from_csv(
         self,
@@ -121,4 +334,4 @@ class VocabularyPipeline:
         output_path: Optional[str] = None
     ) -> str:
         """Synchronous wrapper for process_from_csv_async"""
-        return asyncio.run(self.process_from_csv_async(csv_path, output_path))
\ No newline at end of file
+        return _run(self.process_from_csv_async(csv_path, output_path))
\ No newline at end of file
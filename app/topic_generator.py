@@ -1,13 +1,19 @@
 """Generate vocabulary words from a given topic using LLM"""
+import asyncio
 import csv
+import hashlib
+import json
 from pathlib import Path
-from typing import List
-from langchain_openai import ChatOpenAI
+from typing import List, Optional
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
+from langchain_core.outputs import Generation
+from pydantic import BaseModel, Field, ValidationError
 
 from app.config.settings import get_settings
+from app.llm import create_llm
+from app.utils import is_fresh, atomic_write_bytes
 
 
 class VocabularyList(BaseModel):
@@ -19,20 +25,42 @@ class VocabularyList(BaseModel):
     )
 
 
+class FastPydanticOutputParser(PydanticOutputParser):
+    """
+    PydanticOutputParser that first validates the raw LLM text as JSON in one step.
+    pydantic-core parses and validates straight from the string, skipping the
+    json.loads -> dict -> model_validate round trip. Anything it rejects (e.g. JSON
+    wrapped in a markdown fence) falls back to the lenient default parsing.
+    """
+
+    def parse_result(self, result: List[Generation], *, partial: bool = False):
+        if not partial:
+            try:
+                return self.pydantic_object.model_validate_json(result[0].text)
+            except ValidationError:
+                pass
+        return super().parse_result(result, partial=partial)
+
+
+# The schema dump is the same for every generator, so render it once per process
+_PARSER = FastPydanticOutputParser(pydantic_object=VocabularyList)
+_FORMAT_INSTRUCTIONS = _PARSER.get_format_instructions()
+
+
+# Characters that force csv quoting; non-empty words without them can be written as-is
+_CSV_SPECIAL = frozenset(',"\r\n')
+
+
 class TopicVocabularyGenerator:
     """Generate vocabulary words from topics using LLM"""
 
-    def __init__(self):
-        settings = get_settings()
-        self.llm = ChatOpenAI(
-            model=settings.llm_model,
-            temperature=settings.llm_temperature,
-            api_key=settings.azure_openai_api_key
-        )
-        self.parser = PydanticOutputParser(pydantic_object=VocabularyList)
+    def __init__(self, llm: Optional[BaseChatModel] = None):
+        self.settings = get_settings()
+        self.llm = llm or create_llm()
+        self._cache_dir = Path(self.settings.cache_dir) / "topics"
+        self.parser = _PARSER
 
-    def generate_words_from_topic(self, topic: str) -> List[str]:
-        """Generate vocabulary words for a given topic"""
+        # Build the prompt and chain once; only the topic changes between calls
         prompt = ChatPromptTemplate.from_messages([
             ("system", "You are a helpful English vocabulary teacher."),
             ("human", """Generate a list of 20-30 common and practical English vocabulary words
@@ -45,24 +73,70 @@ The words should be:
 - Appropriate for intermediate English learners
 
 {format_instructions}""")
-        ])
+        ]).partial(format_instructions=_FORMAT_INSTRUCTIONS)
 
-        chain = prompt | self.llm | self.parser
+        self.chain = prompt | self.llm | self.parser
 
-        result = chain.invoke({
-            "topic": topic,
-            "format_instructions": self.parser.get_format_instructions()
-        })
+    def generate_words_from_topic(self, topic: str) -> List[str]:
+        """Generate vocabulary words for a given topic, reusing a cached list if fresh"""
+        cache_path = self._topic_cache_path(topic)
+        words = self._read_cached_words(cache_path)
+        if words is not None:
+            return words
+
+        words = self.chain.invoke({"topic": topic}).words
+        self._write_cached_words(cache_path, words)
+        return words
+
+    async def generate_words_from_topic_async(self, topic: str) -> List[str]:
+        """
+        Async version of generate_words_from_topic. Goes through the model's async
+        client, so the request shares the pooled HTTP client with LLMProcessor.
+        """
+        cache_path = self._topic_cache_path(topic)
+        words = self._read_cached_words(cache_path)
+        if words is not None:
+            return words
+
+        words = (await self.chain.ainvoke({"topic": topic})).words
+        await asyncio.to_thread(self._write_cached_words, cache_path, words)
+        return words
 
-        return result.words
+    def _topic_cache_path(self, topic: str) -> Path:
+        """Cache file for a topic's word list, keyed by a hash of the normalized topic"""
+        key = hashlib.blake2b(topic.strip().lower().encode('utf-8'), digest_size=16).hexdigest()
+        return self._cache_dir / f"{key}.json"
+
+    def _read_cached_words(self, cache_path: Path) -> Optional[List[str]]:
+        """Return the cached word list if present and not expired"""
+        if not is_fresh(cache_path, self.settings.cache_ttl_days):
+            return None
+        try:
+            return json.loads(cache_path.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            # Corrupt cache entry, regenerate
+            return None
+
+    def _write_cached_words(self, cache_path: Path, words: List[str]):
+        atomic_write_bytes(cache_path, json.dumps(words, ensure_ascii=False).encode('utf-8'))
 
     def save_to_csv(self, words: List[str], output_path: str):
         """Save words to CSV file with single column"""
+        words = [word.lower().strip() for word in words]
+        if all(word and _CSV_SPECIAL.isdisjoint(word) for word in words):
+            # Nothing needs quoting, so write the column in one go; newline='' keeps the
+            # output identical to csv.writer's default '\r\n' line terminator
+            Path(output_path).write_text(
+                "word\r\n" + "".join(f"{word}\r\n" for word in words),
+                encoding='utf-8',
+                newline=''
+            )
+            return
+
         with open(output_path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             writer.writerow(['word'])  # Header
-            for word in words:
-                writer.writerow([word.lower().strip()])
+            writer.writerows([word] for word in words)
 
     def generate_and_save(self, topic: str, output_path: str) -> str:
         """Generate words from topic and save to CSV"""
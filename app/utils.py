@@ -1,5 +1,27 @@
 """Utility functions"""
+import os
 import re
+import time
+import tempfile
+from pathlib import Path
+from typing import Iterable, List
+
+
+class _ClozeTable(dict):
+    """str.translate table mapping letters to '_', filled in lazily per code point"""
+
+    def __missing__(self, codepoint: int) -> int:
+        mapped = self[codepoint] = ord("_") if chr(codepoint).isalpha() else codepoint
+        return mapped
+
+
+# Pre-filled for ASCII; other code points are classified on first use and cached
+_CLOZE_TABLE = _ClozeTable(
+    {codepoint: ord("_") if chr(codepoint).isalpha() else codepoint for codepoint in range(128)}
+)
+
+# Byte-level table for the common all-ASCII case, avoiding per-character dict lookups
+_ASCII_CLOZE_TRANS = bytes.maketrans(bytes(range(128)), bytes(_CLOZE_TABLE[i] for i in range(128)))
 
 
 def create_cloze(word: str) -> str:
@@ -9,15 +31,39 @@ def create_cloze(word: str) -> str:
 
     Example: 'ice-cream' -> '___-_____'
     """
-    cloze = ""
-    for char in word:
-        if char.isalpha():
-            cloze += "_"
-        else:
-            cloze += char
-    return cloze
+    if word.isascii():
+        return word.encode('ascii').translate(_ASCII_CLOZE_TRANS).decode('ascii')
+    return word.translate(_CLOZE_TABLE)
 
 
 def clean_word(word: str) -> str:
     """Clean and normalize word"""
     return word.strip().lower()
+
+
+def clean_words(words: Iterable[str]) -> List[str]:
+    """Clean and normalize a list of words, dropping blank ones"""
+    # map() over the unbound str methods keeps the per-word work in C
+    return [word for word in map(str.lower, map(str.strip, words)) if word]
+
+
+def is_fresh(path: Path, ttl_days: float) -> bool:
+    """Check that a cache file exists and is younger than ttl_days"""
+    try:
+        age = time.time() - path.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    return age < ttl_days * 86400
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write data via a temp file + rename so readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -28,6 +28,11 @@ def main():
         type=str,
         help="Topic to generate vocabulary from (e.g., 'Education', 'Travel')"
     )
+    input_group.add_argument(
+        "--topics",
+        type=str,
+        help="Comma-separated topics to process concurrently (e.g., 'Education,Travel')"
+    )
     input_group.add_argument(
         "--csv",
         type=str,
@@ -43,6 +48,9 @@ def main():
 
     args = parser.parse_args()
 
+    if args.topics and args.output:
+        parser.error("--output cannot be used with --topics")
+
     # Initialize pipeline
     pipeline = VocabularyPipeline()
 
@@ -50,6 +58,10 @@ def main():
         if args.topic:
             # Process from topic
             output_path = pipeline.process_from_topic(args.topic, args.output)
+        elif args.topics:
+            # Process several topics, one output file each
+            output_paths = pipeline.process_from_topics(args.topics.split(","))
+            output_path = ", ".join(path for path in output_paths if path)
         else:
             # Process from CSV
             if not Path(args.csv).exists():
@@ -57,6 +69,10 @@ def main():
                 sys.exit(1)
             output_path = pipeline.process_from_csv(args.csv, args.output)
 
+        if not output_path:
+            logger.error("✗ No flashcards were generated")
+            sys.exit(1)
+
         print("\n" + "="*50)
         print("✓ SUCCESS!")
         print(f"Flashcards generated: {output_path}")